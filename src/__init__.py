@@ -2,68 +2,78 @@
 
 from __future__ import annotations
 
+import time
+
 from chimerax.core.toolshed import BundleAPI
 
+# Used by reload scripts to tell whether a module changed since it was loaded.
+_load_time = time.time()
+
+# Command name -> (module, function, description function). Modules are only
+# imported when ChimeraX first registers one of their commands.
+_COMMANDS = {
+    "align center": ("align_center", "align_center", "align_center_desc"),
+    "align symmetry axis": ("align_symmetry_axis", "align_sym_axis", "align_sym_axis_desc"),
+    "bundle profile": ("profiling", "bundle_profile", "bundle_profile_desc"),
+    "fit opposite hand": ("fit_opposite_hand", "fit_opposite_hand", "fit_opposite_hand_desc"),
+    "first residue": ("to_residue", "first_residue", "first_residue_desc"),
+    "last residue": ("to_residue", "last_residue", "last_residue_desc"),
+    "map eraser mask create": (
+        "map_eraser_mask_create",
+        "map_eraser_mask_create",
+        "map_eraser_mask_create_desc",
+    ),
+    "mask combine": ("mask_combine", "mask_combine", "mask_combine_desc"),
+    "molmap cube": ("molmap_cube", "molmap_cube", "molmap_cube_desc"),
+    "molmap cube batch": ("molmap_cube", "molmap_cube_batch", "molmap_cube_batch_desc"),
+    "molmap cube suggest": ("molmap_cube", "molmap_cube_suggest", "molmap_cube_suggest_desc"),
+    "next residue": ("to_residue", "next_residue", "next_residue_desc"),
+    "next worst residue": ("to_residue", "next_worst_residue", "next_worst_residue_desc"),
+    "previous residue": ("to_residue", "previous_residue", "previous_residue_desc"),
+    "previous worst residue": (
+        "to_residue",
+        "previous_worst_residue",
+        "previous_worst_residue_desc",
+    ),
+    "reload scripts": ("reload_scripts", "reload_scripts", "reload_scripts_desc"),
+    "residue fit score": ("to_residue", "residue_fit_score", "residue_fit_score_desc"),
+    "residue panel": ("to_residue", "residue_panel", "residue_panel_desc"),
+    "rough fitmap": ("rough_fitmap", "rough_fitmap", "rough_fitmap_desc"),
+    "soft edge mask": ("soft_edge_mask", "soft_edge_mask", "soft_edge_mask_desc"),
+    "to residue": ("to_residue", "to_residue", "to_residue_desc"),
+}
+
+
+def register_bundle_command(name, logger, synopsis=None):
+    """Import the module providing ``name`` and register the command."""
+    from importlib import import_module
+
+    from chimerax.core.commands import register
+
+    from . import profiling, reload_scripts
+
+    try:
+        module_name, func_name, desc_name = _COMMANDS[name]
+    except KeyError as err:  # noqa: B904
+        raise ValueError(f"trying to register unknown command: {name}") from err
+
+    module = import_module(f".{module_name}", __name__)
+    reload_scripts.record_module(module)
+    func = getattr(module, func_name)
+    desc = getattr(module, desc_name)()
+    if desc.synopsis is None:
+        desc.synopsis = synopsis
+    if func is not profiling.bundle_profile:
+        func = profiling.profiled(name, func)
+    register(name, desc, func, logger=logger)
+
 
 class _CustomFunctionsAPI(BundleAPI):
     api_version = 1
 
     @staticmethod
     def register_command(bi, ci, logger):
-        from chimerax.core.commands import register
-
-        from . import (
-            align_center,
-            align_symmetry_axis,
-            fit_opposite_hand,
-            map_eraser_mask_create,
-            molmap_cube,
-            reload_scripts,
-            rough_fitmap,
-            soft_edge_mask,
-            to_residue,
-        )
-
-        command_map = {
-            "align center": (align_center.align_center, align_center.align_center_desc),
-            "align symmetry axis": (
-                align_symmetry_axis.align_sym_axis,
-                align_symmetry_axis.align_sym_axis_desc,
-            ),
-            "fit opposite hand": (
-                fit_opposite_hand.fit_opposite_hand,
-                fit_opposite_hand.fit_opposite_hand_desc,
-            ),
-            "first residue": (to_residue.first_residue, to_residue.first_residue_desc),
-            "last residue": (to_residue.last_residue, to_residue.last_residue_desc),
-            "map eraser mask create": (
-                map_eraser_mask_create.map_eraser_mask_create,
-                map_eraser_mask_create.map_eraser_mask_create_desc,
-            ),
-            "molmap cube": (molmap_cube.molmap_cube, molmap_cube.molmap_cube_desc),
-            "next residue": (to_residue.next_residue, to_residue.next_residue_desc),
-            "previous residue": (
-                to_residue.previous_residue,
-                to_residue.previous_residue_desc,
-            ),
-            "reload scripts": (reload_scripts.reload_scripts, reload_scripts.reload_scripts_desc),
-            "rough fitmap": (rough_fitmap.rough_fitmap, rough_fitmap.rough_fitmap_desc),
-            "soft edge mask": (
-                soft_edge_mask.soft_edge_mask,
-                soft_edge_mask.soft_edge_mask_desc,
-            ),
-            "to residue": (to_residue.to_residue, to_residue.to_residue_desc),
-        }
-
-        try:
-            func, desc_func = command_map[ci.name]
-        except KeyError as err:  # noqa: B904
-            raise ValueError(f"trying to register unknown command: {ci.name}") from err
-
-        desc = desc_func()
-        if desc.synopsis is None:
-            desc.synopsis = ci.synopsis
-        register(ci.name, desc, func, logger=logger)
+        register_bundle_command(ci.name, logger, ci.synopsis)
 
     @staticmethod
     def initialize(session, bi):
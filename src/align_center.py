@@ -41,62 +41,125 @@ def parse_map_or_atoms(session, atomspec):
     return maps[0][0]
 
 
-def align_center(session, model, to=None, MoveAtomSubset=False):
+def parse_maps_and_atoms(session, atomspec):
+    """Return ``(volumes, atoms)`` selected by ``atomspec``."""
+    from chimerax.atomic import AtomsArg
+    from chimerax.map import MapsArg
+
+    maps = MapsArg().parse(str(atomspec), session)[0]
+    atoms = AtomsArg().parse(str(atomspec), session)[0]
+    return list(maps), atoms
+
+
+def volume_scene_center(volume):
+    """Return the scene coordinates of the center of mass of ``volume``."""
+    from chimerax.std_commands.measure_center import volume_center_of_mass
+
+    ijk_center = volume_center_of_mass(volume)
+    if np.isnan(ijk_center[0]):
+        raise ValueError("Map has no volume. Set threshold level to display density.")
+    xyz = volume.data.ijk_to_xyz(ijk_center)
+    return volume.scene_position * xyz
+
+
+def structure_centroids(atoms):
+    """Return ``(structures, centers, atom_group)`` for atoms grouped by structure.
+
+    All centroids are computed in a single pass over the scene coordinates.
+    ``atom_group`` maps each atom to its row in ``centers``.
+    """
+    _, first, atom_group = np.unique(
+        atoms.structures.pointers, return_index=True, return_inverse=True
+    )
+    atom_group = atom_group.ravel()
+    counts = np.bincount(atom_group)
+    sums = np.zeros((len(counts), 3), dtype=np.float64)
+    np.add.at(sums, atom_group, atoms.scene_coords)
+    centers = sums / counts[:, np.newaxis]
+    structures = [atoms[int(i)].structure for i in first]
+    return structures, centers, atom_group
+
+
+def _target_center(session, to):
     from chimerax.atomic.molarray import Atoms
-    from chimerax.core.commands import atomspec, run
     from chimerax.map.volume import Volume
-    from chimerax.std_commands.measure_center import volume_center_of_mass
+
+    if to is None:
+        return np.asarray(session.main_view.center_of_rotation, dtype=np.float64)
+    if isinstance(to, Atoms):
+        return np.asarray(define_centroid(session, to), dtype=np.float64)
+    if isinstance(to, Volume):
+        return np.asarray(volume_scene_center(to), dtype=np.float64)
+    raise ValueError(f"'Model to' type not recognised: {type(to)}")
+
+
+def align_center(session, model, to=None, MoveAtomSubset=False, each=False):
+    """Move ``model`` so its center is at the center of ``to``.
+
+    By default all selected atoms and maps move together as one rigid group.
+    With ``each`` every structure and map is centered on the target
+    separately, for aligning many models in a single call.
+    """
+    from chimerax.atomic.molarray import Atoms
+    from chimerax.core.commands import atomspec
+    from chimerax.core.errors import UserError
+    from chimerax.geometry import translation
+    from chimerax.map.volume import Volume
 
     if isinstance(model, atomspec.AtomSpec):
-        model = parse_map_or_atoms(session, model)
+        volumes, atoms = parse_maps_and_atoms(session, model)
+    elif isinstance(model, Atoms):
+        volumes, atoms = [], model
+    elif isinstance(model, Volume):
+        volumes, atoms = [model], None
+    elif isinstance(model, (list, tuple)) and all(isinstance(v, Volume) for v in model):
+        volumes, atoms = list(model), None
+    else:
+        raise ValueError(f"Model type not recognised: {type(model)}")
     if to is not None and isinstance(to, atomspec.AtomSpec):
         to = parse_map_or_atoms(session, to)
 
-    if isinstance(model, Atoms):
-        model_id = model.spec
-        model_center = define_centroid(session, model)
-        move_string = "atoms"
-    elif isinstance(model, Volume):
-        model_id = f"#{model.id_string}"
-        model_center = volume_center_of_mass(model)
-        if np.isnan(model_center[0]):
-            raise ValueError("Map has no volume. Set threshold level to display density.")
-        model_xyz = model.data.ijk_to_xyz(model_center)
-        model_center = model.scene_position * model_xyz
-        move_string = "models"
+    if not volumes and not atoms:
+        raise UserError("No maps or atoms specified")
+
+    to_center = _target_center(session, to)
+    volume_centers = np.array([volume_scene_center(v) for v in volumes]).reshape(-1, 3)
+
+    if atoms:
+        structures, atom_centers, atom_group = structure_centroids(atoms)
     else:
-        raise ValueError(f"Model type not recognised: {type(model)}")
+        structures, atom_centers, atom_group = [], np.zeros((0, 3)), None
 
-    if to is not None:
-        if isinstance(to, Atoms):
-            to_center = define_centroid(session, to)
-        elif isinstance(to, Volume):
-            to_center = volume_center_of_mass(to)
-            if np.isnan(to_center[0]):
-                raise ValueError("Map has no volume. Set threshold level to display density.")
-            to_xyz = to.data.ijk_to_xyz(to_center)
-            to_center = to.scene_position * to_xyz
-        else:
-            raise ValueError(f"'Model to' type not recognised: {type(to)}")
+    if each:
+        atom_shifts = to_center - atom_centers
+        volume_shifts = to_center - volume_centers
     else:
-        to_center = session.main_view.center_of_rotation
-
-    move_atom_subset = MoveAtomSubset
-    if not move_atom_subset:
-        move_string = "model"
-
-    s2c = session.main_view.camera.position.inverse()
-    screen_model_center = s2c.transform_points(np.expand_dims(model_center, 0))
-    screen_target_center = s2c.transform_points(np.expand_dims(to_center, 0))
-    center_dif = [-1 * (m - a) for m, a in zip(screen_model_center[0], screen_target_center[0])]
-    cmd = "move %0.2f,%0.2f,%0.2f %s %s" % (
-        center_dif[0],
-        center_dif[1],
-        center_dif[2],
-        move_string,
-        model_id,
-    )
-    run(session, cmd)
+        group_centers = list(volume_centers)
+        if atoms:
+            group_centers.append(define_centroid(session, atoms))
+        shift = to_center - np.mean(group_centers, axis=0)
+        atom_shifts = np.tile(shift, (len(structures), 1))
+        volume_shifts = np.tile(shift, (len(volumes), 1))
+
+    moved = []
+    if atoms:
+        if MoveAtomSubset:
+            atoms.scene_coords = atoms.scene_coords + atom_shifts[atom_group]
+            moved.extend(s.atomspec for s in structures)
+        else:
+            for structure, shift in zip(structures, atom_shifts):
+                structure.scene_position = translation(shift) * structure.scene_position
+                moved.append(structure.atomspec)
+
+    for volume, shift in zip(volumes, volume_shifts):
+        volume.scene_position = translation(shift) * volume.scene_position
+        moved.append(f"#{volume.id_string}")
+
+    if len(moved) > 1:
+        how = "individually" if each else "as a group"
+        session.logger.status(
+            f"Centered {len(moved)} models {how}: {' '.join(moved)}", log=True
+        )
 
 
 def align_center_desc():
@@ -104,10 +167,18 @@ def align_center_desc():
 
     return CmdDesc(
         required=[("model", AtomSpecArg)],
-        keyword=[("to", AtomSpecArg), ("MoveAtomSubset", BoolArg)],
+        keyword=[("to", AtomSpecArg), ("MoveAtomSubset", BoolArg), ("each", BoolArg)],
         required_arguments=[],
-        synopsis="Move a model or atoms to the center of another model without rotation.",
+        synopsis="Move models or atoms to the center of another model without rotation.",
     )
 
 
-__all__ = ["align_center", "align_center_desc", "define_centroid", "parse_map_or_atoms"]
+__all__ = [
+    "align_center",
+    "align_center_desc",
+    "define_centroid",
+    "parse_map_or_atoms",
+    "parse_maps_and_atoms",
+    "structure_centroids",
+    "volume_scene_center",
+]
@@ -0,0 +1,151 @@
+"""On-disk cache of rough fitmap results."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import numpy as np
+
+# Least recently used fits are removed once the stored transforms exceed this.
+MAX_CACHE_BYTES = 16 * 2**20
+
+
+def cache_path():
+    from chimerax import app_dirs
+
+    return os.path.join(app_dirs.user_data_dir, "custom_functions_fit_cache.sqlite")
+
+
+def _connect(path=None):
+    path = path or cache_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS fits ("
+        "key TEXT PRIMARY KEY, transforms TEXT, score REAL, last_used REAL)"
+    )
+    return connection
+
+
+def _hash_model(digest, model):
+    from chimerax.atomic.molarray import Atoms
+
+    if isinstance(model, Atoms):
+        digest.update(b"atoms")
+        digest.update(np.ascontiguousarray(model.coords, dtype=np.float64).tobytes())
+    else:
+        data = model.data
+        digest.update(b"map")
+        digest.update(np.asarray(data.size, dtype=np.int64).tobytes())
+        digest.update(np.asarray(data.origin, dtype=np.float64).tobytes())
+        digest.update(np.asarray(data.step, dtype=np.float64).tobytes())
+        digest.update(np.ascontiguousarray(model.full_matrix()).tobytes())
+
+
+def _hash_levels(digest, volume):
+    levels = sorted(surface.level for surface in volume.surfaces)
+    digest.update(np.asarray(levels, dtype=np.float64).tobytes())
+
+
+def model_hash(model):
+    """Return a content hash of the atom coordinates or map data of ``model``.
+
+    For a map the surface levels are included too, since fitting a map uses
+    only the points above its contour level.
+    """
+    from chimerax.atomic.molarray import Atoms
+
+    digest = hashlib.blake2b(digest_size=20)
+    _hash_model(digest, model)
+    if not isinstance(model, Atoms):
+        _hash_levels(digest, model)
+    return digest.hexdigest()
+
+
+def fit_key(model, inmap, model_digest=None, **params):
+    """Return a content hash of ``model``, ``inmap`` and the search parameters.
+
+    ``model_digest`` from :func:`model_hash` avoids rehashing a model that is
+    fitted into several maps. The surface levels of ``inmap`` are included
+    because the search ranks fits by the atoms outside its contour.
+    """
+    if model_digest is None:
+        model_digest = model_hash(model)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(bytes.fromhex(model_digest))
+    _hash_model(digest, inmap)
+    _hash_levels(digest, inmap)
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def _warn(logger, action, path, err):
+    if logger is not None:
+        logger.warning(f"Fit cache {path or cache_path()} could not be {action}: {err}")
+
+
+def lookup(key, path=None, logger=None):
+    """Return ``(transforms, score)`` for ``key`` or None.
+
+    Transforms are 3x4 matrices relative to the map's scene position. If the
+    cache can't be read a warning is logged and None is returned.
+    """
+    try:
+        with closing(_connect(path)) as connection, connection:
+            row = connection.execute(
+                "SELECT transforms, score FROM fits WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute("UPDATE fits SET last_used = ? WHERE key = ?", (time.time(), key))
+    except (sqlite3.Error, OSError) as err:
+        _warn(logger, "read", path, err)
+        return None
+    return [np.array(m) for m in json.loads(row[0])], row[1]
+
+
+def store(key, transforms, score, path=None, logger=None):
+    """Save a fit for ``key``. Failures are logged and otherwise ignored."""
+    try:
+        with closing(_connect(path)) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO fits VALUES (?, ?, ?, ?)",
+                (key, json.dumps([np.asarray(m).tolist() for m in transforms]), score, time.time()),
+            )
+            total = 0
+            for old_key, size in connection.execute(
+                "SELECT key, length(transforms) FROM fits ORDER BY last_used DESC"
+            ).fetchall():
+                total += size
+                if total > MAX_CACHE_BYTES:
+                    connection.execute("DELETE FROM fits WHERE key = ?", (old_key,))
+    except (sqlite3.Error, OSError) as err:
+        _warn(logger, "written", path, err)
+
+
+def relative_transforms(models, inmap):
+    to_map = inmap.scene_position.inverse()
+    return [(to_map * m.scene_position).matrix for m in models]
+
+
+def apply_transforms(models, inmap, transforms):
+    from chimerax.geometry import Place
+
+    for model, matrix in zip(models, transforms):
+        model.scene_position = inmap.scene_position * Place(matrix)
+
+
+__all__ = [
+    "apply_transforms",
+    "cache_path",
+    "fit_key",
+    "lookup",
+    "model_hash",
+    "relative_transforms",
+    "store",
+]
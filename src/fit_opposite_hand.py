@@ -16,6 +16,7 @@ def fit_opposite_hand(
     sym=False,
     refine=True,
     SkipRoughFit=False,
+    cache=True,
 ):
     from chimerax.atomic import AtomicStructuresArg
     from chimerax.atomic.cmd import combine_cmd
@@ -60,7 +61,7 @@ def fit_opposite_hand(
     if not SkipRoughFit:
         run(
             session,
-            f"rough fitmap {atoms_or_map_id} inmap {flipped_volume_id} search {search} radius {radius} refine False",
+            f"rough fitmap {atoms_or_map_id} inmap {flipped_volume_id} search {search} radius {radius} refine False cache {cache}",
         )
 
     if refine:
@@ -92,6 +93,7 @@ def fit_opposite_hand_desc():
             ("sym", BoolArg),
             ("refine", BoolArg),
             ("SkipRoughFit", BoolArg),
+            ("cache", BoolArg),
         ],
         required_arguments=["atoms_or_map", "inmap"],
         synopsis="Fit a model into an opposite-hand map.",
@@ -0,0 +1,192 @@
+"""Mask combine command implementation."""
+
+from __future__ import annotations
+
+import re
+
+import numpy as np
+
+from .profiling import stage
+from .soft_edge_mask import extend_and_soften_mask
+
+# Approximate number of voxels read per mask for each z slab.
+SLAB_VOXELS = 1 << 22
+
+_TOKEN = re.compile(
+    r"\s*(?:(?P<map>#[\d.]+)(?:@(?P<level>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?))?"
+    r"|(?P<op>[|&\-()]))"
+)
+
+
+def tokenize(expression):
+    tokens = []
+    pos = 0
+    expression = expression.rstrip()
+    while pos < len(expression):
+        match = _TOKEN.match(expression, pos)
+        if match is None:
+            raise ValueError(f"Cannot parse mask expression at: {expression[pos:]!r}")
+        if match.group("map"):
+            level = match.group("level")
+            tokens.append(("map", match.group("map"), None if level is None else float(level)))
+        else:
+            tokens.append(("op", match.group("op")))
+        pos = match.end()
+    return tokens
+
+
+def parse_expression(expression):
+    """Parse a mask expression into a tree of tuples.
+
+    Leaves are ``("map", spec, level)``. ``&`` (intersection) binds tighter
+    than ``|`` (union) and ``-`` (subtract), which are evaluated left to
+    right. Parentheses group terms.
+    """
+    tokens = tokenize(expression)
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else None
+
+    def take():
+        nonlocal pos
+        token = peek()
+        if token is None:
+            raise ValueError("Unexpected end of mask expression")
+        pos += 1
+        return token
+
+    def operand():
+        token = take()
+        if token[0] == "map":
+            return token
+        if token[1] == "(":
+            node = union()
+            if take() != ("op", ")"):
+                raise ValueError("Missing ')' in mask expression")
+            return node
+        raise ValueError(f"Unexpected '{token[1]}' in mask expression")
+
+    def intersection():
+        node = operand()
+        while peek() == ("op", "&"):
+            take()
+            node = ("and", node, operand())
+        return node
+
+    def union():
+        node = intersection()
+        while peek() in (("op", "|"), ("op", "-")):
+            op = take()[1]
+            node = ("or" if op == "|" else "subtract", node, intersection())
+        return node
+
+    tree = union()
+    if peek() is not None:
+        raise ValueError(f"Unexpected '{peek()[1]}' in mask expression")
+    return tree
+
+
+def _leaves(tree):
+    if tree[0] == "map":
+        return [tree]
+    return _leaves(tree[1]) + _leaves(tree[2])
+
+
+def _evaluate_slab(tree, volumes, default_level, z0, z1):
+    if tree[0] == "map":
+        data = volumes[tree[1]].data
+        nx, ny, _nz = data.size
+        slab = data.matrix(ijk_origin=(0, 0, z0), ijk_size=(nx, ny, z1 - z0))
+        level = default_level if tree[2] is None else tree[2]
+        return slab >= level
+    a = _evaluate_slab(tree[1], volumes, default_level, z0, z1)
+    b = _evaluate_slab(tree[2], volumes, default_level, z0, z1)
+    if tree[0] == "and":
+        return np.logical_and(a, b, out=a)
+    if tree[0] == "or":
+        return np.logical_or(a, b, out=a)
+    return np.logical_and(a, ~b, out=a)
+
+
+def combine_masks(tree, volumes, level=0.5):
+    """Evaluate ``tree`` over z slabs and return a float32 binary mask."""
+    data = next(iter(volumes.values())).data
+    nx, ny, nz = data.size
+    result = np.zeros((nz, ny, nx), dtype=np.float32)
+    planes = max(1, SLAB_VOXELS // (nx * ny))
+    for z0 in range(0, nz, planes):
+        z1 = min(nz, z0 + planes)
+        result[z0:z1] = _evaluate_slab(tree, volumes, level, z0, z1)
+    return result
+
+
+def mask_combine(session, expression, level=0.5, extend=0, width=0, name="combined mask"):
+    from chimerax.core.errors import UserError
+    from chimerax.map import MapArg, volume_from_grid_data
+
+    from .sparse_mask import SparseMaskGridData
+
+    try:
+        tree = parse_expression(expression)
+    except ValueError as err:
+        raise UserError(str(err)) from err
+
+    volumes = {}
+    for _kind, spec, _level in _leaves(tree):
+        if spec not in volumes:
+            volumes[spec] = MapArg().parse(spec, session)[0]
+    sizes = {tuple(v.data.size) for v in volumes.values()}
+    if len(sizes) > 1:
+        raise UserError("All masks must have the same grid size.")
+    first = next(iter(volumes.values()))
+    for volume in volumes.values():
+        if not (
+            np.allclose(volume.data.origin, first.data.origin)
+            and np.allclose(volume.data.step, first.data.step)
+            and np.allclose(volume.scene_position.matrix, first.scene_position.matrix)
+        ):
+            raise UserError(
+                "All masks must have the same origin, voxel size and position. "
+                "Use 'volume resample' to put them on the same grid."
+            )
+
+    session.logger.status(f"Combining {len(volumes)} masks...", log=True)
+    with stage("combine"):
+        combined = combine_masks(tree, volumes, level)
+    if extend != 0 or width > 0:
+        combined = extend_and_soften_mask(combined, 0.5, extend, width).astype(np.float32)
+
+    data = first.data
+    with stage("create model"):
+        grid = SparseMaskGridData(
+            combined,
+            origin=data.origin,
+            step=data.step,
+            cell_angles=data.cell_angles,
+            rotation=data.rotation,
+            symmetries=data.symmetries,
+            name=name,
+        )
+        volume = volume_from_grid_data(grid, session)
+        volume.scene_position = first.scene_position
+        return volume
+
+
+def mask_combine_desc():
+    from chimerax.core.commands import CmdDesc, FloatArg, StringArg
+
+    return CmdDesc(
+        required=[("expression", StringArg)],
+        keyword=[
+            ("level", FloatArg),
+            ("extend", FloatArg),
+            ("width", FloatArg),
+            ("name", StringArg),
+        ],
+        required_arguments=["expression"],
+        synopsis="Combine binarized masks with union, intersection and subtraction.",
+    )
+
+
+__all__ = ["combine_masks", "mask_combine", "mask_combine_desc", "parse_expression"]
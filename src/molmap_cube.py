@@ -2,19 +2,54 @@
 
 from __future__ import annotations
 
+import itertools
+import os
+
 import numpy as np
 
 from .align_center import define_centroid
+from .gaussian_splat import CUTOFF_RANGE, SIGMA_FACTOR, splat_gaussians
+
+ENGINES = ("molmap", "native")
+
+
+def _native_molmap_cube(session, atoms, resolution, size, spacing):
+    from chimerax.map import volume_from_grid_data
+    from chimerax.map_data import ArrayGridData
+
+    atoms_center = define_centroid(session, atoms)
+    origin = np.asarray(atoms_center) - (size / 2.0) * spacing
+    session.logger.status("Splatting atom Gaussians...", log=True)
+    matrix = splat_gaussians(
+        atoms.scene_coords,
+        atoms.element_numbers,
+        resolution,
+        size,
+        spacing,
+        origin,
+    )
+    grid = ArrayGridData(
+        matrix,
+        origin=tuple(origin),
+        step=(spacing, spacing, spacing),
+        name="molmap cube",
+    )
+    volume = volume_from_grid_data(grid, session)
+    session.logger.status("Done.", log=True)
+    session.logger.status(
+        "Box displayed is %d pixels with a spacing of %.2f angstrom/pixel" % (size, spacing),
+        log=True,
+    )
+    return volume
 
 
-def molmap_cube(session, atoms, resolution, size, spacing):
+def _centered_box(session, center, size, spacing, name="box"):
     from chimerax.core.commands import run
-    from chimerax.map import molmap
     from chimerax.map_filter.vopcommand import volume_new
 
     box = volume_new(
         session,
-        name="box",
+        name=name,
         size=(size, size, size),
         grid_spacing=(spacing, spacing, spacing),
     )
@@ -23,13 +58,12 @@ def molmap_cube(session, atoms, resolution, size, spacing):
     run(session, f"volume #{box_id} level 0")
     run(session, f"trans #{box_id} 70")
 
-    atoms_center = define_centroid(session, atoms)
     half_map = (size / 2.0) * spacing
     map_center = (half_map, half_map, half_map)
 
     s2c = session.main_view.camera.position.inverse()
     screen_map_center = s2c.transform_points(np.expand_dims(map_center, 0))
-    screen_atoms_center = s2c.transform_points(np.expand_dims(atoms_center, 0))
+    screen_atoms_center = s2c.transform_points(np.expand_dims(center, 0))
     center_dif = [-1 * (m - a) for m, a in zip(screen_map_center[0], screen_atoms_center[0])]
     run(session, "move %0.2f,%0.2f,%0.2f models #%s" % (
         center_dif[0],
@@ -37,6 +71,17 @@ def molmap_cube(session, atoms, resolution, size, spacing):
         center_dif[2],
         box_id,
     ))
+    return box
+
+
+def molmap_cube(session, atoms, resolution, size, spacing, engine="molmap"):
+    from chimerax.map import molmap
+
+    if engine == "native":
+        return _native_molmap_cube(session, atoms, resolution, size, spacing)
+
+    atoms_center = define_centroid(session, atoms)
+    box = _centered_box(session, atoms_center, size, spacing)
 
     session.logger.status("Running molmap with onGrid option...", log=True)
     molmap.molmap(session, atoms, resolution, on_grid=box)
@@ -47,16 +92,296 @@ def molmap_cube(session, atoms, resolution, size, spacing):
     )
 
 
+def prime_factors(n):
+    """Return the prime factors of ``n`` in increasing order."""
+    factors = []
+    p = 2
+    while p * p <= n:
+        while n % p == 0:
+            factors.append(p)
+            n //= p
+        p += 1
+    if n > 1:
+        factors.append(n)
+    return factors
+
+
+def is_fast_fft_size(n):
+    """Return True for even sizes of the form 2^a * 3^b * 5^c."""
+    return n % 2 == 0 and all(p <= 5 for p in prime_factors(n))
+
+
+def fft_friendly_sizes(min_size, count=3):
+    """Return the ``count`` smallest fast FFT box sizes of at least ``min_size``."""
+    sizes = []
+    n = max(2, int(min_size))
+    while len(sizes) < count:
+        if is_fast_fft_size(n):
+            sizes.append(n)
+        n += 1
+    return sizes
+
+
+def fft_cost(n):
+    """Estimated operation count of a 3D FFT on a cubic box of side ``n``.
+
+    A mixed radix FFT of length ``n`` costs about ``n * sum(prime factors)``
+    operations, so sizes with a large prime factor are much slower.
+    """
+    return 3 * n**3 * sum(prime_factors(n))
+
+
+def molmap_cube_suggest(session, atoms, spacing, padding=1.5, count=3, show=True):
+    from chimerax.core.errors import UserError
+
+    if not atoms:
+        raise UserError("Atom specifier selects no atoms")
+    if spacing <= 0:
+        raise UserError("Spacing must be greater than 0")
+    if padding <= 0:
+        raise UserError("Padding must be greater than 0")
+    if count < 1:
+        raise UserError("Count must be at least 1")
+    xyz = atoms.scene_coords
+    center = xyz.mean(axis=0)
+    radius = np.sqrt(((xyz - center) ** 2).sum(axis=1).max())
+    diameter = 2 * radius
+    min_size = int(np.ceil(diameter * padding / spacing))
+    sizes = fft_friendly_sizes(min_size, count)
+
+    session.logger.status(
+        "Maximum particle diameter %.1f angstrom. With padding %.2f the box must be "
+        "at least %d pixels at %.2f angstrom/pixel." % (diameter, padding, min_size, spacing),
+        log=True,
+    )
+    base_cost = fft_cost(sizes[0])
+    rows = sizes if min_size in sizes else [min_size] + sizes
+    lines = ["Box size  Box length (angstrom)  Relative FFT cost"]
+    for size in rows:
+        lines.append("%8d  %21.1f  %17.2f" % (size, size * spacing, fft_cost(size) / base_cost))
+    session.logger.info("<pre>%s</pre>" % "\n".join(lines), is_html=True)
+
+    if show:
+        for size in sizes:
+            _centered_box(session, center, size, spacing, name=f"box {size}")
+    session.logger.status(
+        "Suggested box sizes: " + ", ".join(str(size) for size in sizes),
+        log=True,
+    )
+    return sizes
+
+
+def gaussian_cube(xyz, weights, resolution, size, spacing, center, engine="molmap"):
+    """Return a float32 molmap cube of ``size`` voxels per side centered on ``center``.
+
+    Only needs numpy arrays so it can run in worker threads without
+    creating any models.
+    """
+    origin = np.asarray(center, dtype=np.float64) - (size / 2.0) * spacing
+    if engine == "native":
+        return splat_gaussians(xyz, weights, resolution, size, spacing, origin, threads=1)
+
+    from chimerax.map._map import sum_of_gaussians
+
+    sdev = resolution * SIGMA_FACTOR
+    ijk = ((xyz - origin) / spacing).astype(np.float32)
+    sdevs = np.full((len(ijk), 3), sdev / spacing, dtype=np.float32)
+    normalization = pow(2 * np.pi, -1.5) * pow(sdev, -3)
+    scaled_weights = (weights * normalization).astype(np.float32)
+    matrix = np.zeros((size, size, size), dtype=np.float32)
+    sum_of_gaussians(ijk, scaled_weights, sdevs, CUTOFF_RANGE, matrix)
+    return matrix
+
+
+def _iter_batch(jobs, workers):
+    """Yield the map for each job in job order.
+
+    Jobs run on a thread pool inside this process, so no process is forked
+    from the running ChimeraX and the coordinate arrays are shared rather
+    than copied. At most ``2 * workers`` finished maps are held at once.
+    """
+    from collections import deque
+    from concurrent.futures import ThreadPoolExecutor
+
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield gaussian_cube(*job)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.submit(gaussian_cube, *job))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def write_mrc_volume_stack(path, matrices, count, size, spacing):
+    """Write ``count`` cubic float32 maps to ``path`` as an MRC2014 volume stack.
+
+    The header uses space group 401 with ``mz`` set to the box size so readers
+    see ``count`` separate 3D volumes. Maps are written as they arrive.
+    """
+    import struct
+
+    header = bytearray(1024)
+    struct.pack_into("<3i", header, 0, size, size, size * count)
+    struct.pack_into("<i", header, 12, 2)
+    struct.pack_into("<3i", header, 28, size, size, size)
+    struct.pack_into("<3f", header, 40, size * spacing, size * spacing, size * spacing)
+    struct.pack_into("<3f", header, 52, 90.0, 90.0, 90.0)
+    struct.pack_into("<3i", header, 64, 1, 2, 3)
+    struct.pack_into("<i", header, 88, 401)
+    struct.pack_into("<i", header, 108, 20140)
+    header[208:212] = b"MAP "
+    header[212:216] = bytes((0x44, 0x44, 0, 0))
+    struct.pack_into("<i", header, 220, 1)
+    label = b"ChimeraX molmap cube batch volume stack"
+    header[224 : 224 + len(label)] = label
+
+    dmin, dmax, total, total_sq, n = np.inf, -np.inf, 0.0, 0.0, 0
+    with open(path, "wb") as f:
+        f.write(header)
+        for matrix in matrices:
+            matrix = np.ascontiguousarray(matrix, dtype="<f4")
+            f.write(matrix.tobytes())
+            dmin = min(dmin, float(matrix.min()))
+            dmax = max(dmax, float(matrix.max()))
+            total += float(matrix.sum(dtype=np.float64))
+            total_sq += float(np.square(matrix, dtype=np.float64).sum())
+            n += matrix.size
+        mean = total / n if n else 0.0
+        rms = np.sqrt(max(0.0, total_sq / n - mean * mean)) if n else 0.0
+        f.seek(76)
+        f.write(struct.pack("<3f", dmin, dmax, mean))
+        f.seek(216)
+        f.write(struct.pack("<f", rms))
+
+
+def molmap_cube_batch(
+    session,
+    structures,
+    resolutions,
+    sizes,
+    spacings,
+    file_root="template",
+    stack=False,
+    workers=None,
+    engine="molmap",
+):
+    from chimerax.core.errors import UserError
+    from chimerax.map_data import ArrayGridData
+    from chimerax.map_data.mrc.writemrc import write_mrc2000_grid_data
+
+    if workers is None:
+        workers = min(4, os.cpu_count() or 1)
+    if stack and (len(set(sizes)) > 1 or len(set(spacings)) > 1):
+        raise UserError("All maps in a stack must have the same box size and pixel size.")
+
+    models = []
+    for structure in structures:
+        atoms = structure.atoms
+        if not atoms:
+            continue
+        xyz = atoms.scene_coords
+        models.append((structure, xyz, atoms.element_numbers.astype(np.float32), xyz.mean(axis=0)))
+    if not models:
+        raise UserError("No atoms specified")
+
+    params = list(itertools.product(models, resolutions, sizes, spacings))
+    jobs = [
+        (xyz, weights, resolution, size, spacing, center, engine)
+        for (_s, xyz, weights, center), resolution, size, spacing in params
+    ]
+    session.logger.status(
+        f"Computing {len(jobs)} molmap cubes using {min(workers, len(jobs))} threads...",
+        log=True,
+    )
+    matrices = _iter_batch(jobs, workers)
+
+    paths = []
+    if stack:
+        path = f"{file_root}.mrcs"
+        write_mrc_volume_stack(path, matrices, len(jobs), sizes[0], spacings[0])
+        paths.append(path)
+    else:
+        for ((structure, *_), resolution, size, spacing), matrix in zip(params, matrices):
+            grid = ArrayGridData(matrix, step=(spacing, spacing, spacing))
+            path = "%s_%s_res%g_box%d_apix%g.mrc" % (
+                file_root,
+                structure.id_string.replace(".", "-"),
+                resolution,
+                size,
+                spacing,
+            )
+            write_mrc2000_grid_data(grid, path)
+            paths.append(path)
+
+    session.logger.status(f"Files output: {' '.join(paths)}", log=True)
+    return paths
+
+
 def molmap_cube_desc():
     from chimerax.atomic import AtomsArg
-    from chimerax.core.commands import CmdDesc, FloatArg, IntArg
+    from chimerax.core.commands import CmdDesc, EnumOf, FloatArg, IntArg
 
     return CmdDesc(
         required=[("atoms", AtomsArg), ("resolution", FloatArg), ("size", IntArg), ("spacing", FloatArg)],
-        keyword=[],
+        keyword=[("engine", EnumOf(ENGINES))],
         required_arguments=["atoms", "resolution", "size", "spacing"],
         synopsis="Create a cubic molmap volume with specified size and spacing.",
     )
 
 
-__all__ = ["molmap_cube", "molmap_cube_desc"]
+def molmap_cube_suggest_desc():
+    from chimerax.atomic import AtomsArg
+    from chimerax.core.commands import BoolArg, CmdDesc, FloatArg, IntArg
+
+    return CmdDesc(
+        required=[("atoms", AtomsArg), ("spacing", FloatArg)],
+        keyword=[("padding", FloatArg), ("count", IntArg), ("show", BoolArg)],
+        required_arguments=["atoms", "spacing"],
+        synopsis="Suggest FFT friendly cubic box sizes for a model.",
+    )
+
+
+def molmap_cube_batch_desc():
+    from chimerax.atomic import AtomicStructuresArg
+    from chimerax.core.commands import (
+        BoolArg,
+        CmdDesc,
+        EnumOf,
+        FloatsArg,
+        IntArg,
+        IntsArg,
+        StringArg,
+    )
+
+    return CmdDesc(
+        required=[("structures", AtomicStructuresArg)],
+        keyword=[
+            ("resolutions", FloatsArg),
+            ("sizes", IntsArg),
+            ("spacings", FloatsArg),
+            ("file_root", StringArg),
+            ("stack", BoolArg),
+            ("workers", IntArg),
+            ("engine", EnumOf(ENGINES)),
+        ],
+        required_arguments=["structures", "resolutions", "sizes", "spacings"],
+        synopsis="Write cubic molmaps for every combination of models, resolutions, box and pixel sizes.",
+    )
+
+
+__all__ = [
+    "fft_friendly_sizes",
+    "gaussian_cube",
+    "molmap_cube",
+    "molmap_cube_batch",
+    "molmap_cube_batch_desc",
+    "molmap_cube_desc",
+    "molmap_cube_suggest",
+    "molmap_cube_suggest_desc",
+]
@@ -0,0 +1,152 @@
+"""Per-stage profiling of bundle commands."""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+_state = {"enabled": False, "path": None, "session": None, "records": [], "started_tracing": False}
+_active = []
+
+
+def _default_path():
+    from chimerax import app_dirs
+
+    return os.path.join(app_dirs.user_data_dir, "custom_functions_profile.jsonl")
+
+
+def is_enabled():
+    return _state["enabled"]
+
+
+def _mark():
+    """Start a memory measurement and return the traced memory at this point."""
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+    else:
+        # Python 3.8 has no reset_peak, but clearing the traces also resets
+        # the peak so allocations from here on are still measured.
+        tracemalloc.clear_traces()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def _peak_mb(start):
+    """Return the peak memory allocated above ``start`` since :func:`_mark`."""
+    _current, peak = tracemalloc.get_traced_memory()
+    return max(0, peak - start) / 2**20
+
+
+@contextmanager
+def stage(name):
+    """Time a named stage of the command currently being profiled."""
+    if not _state["enabled"] or not _active:
+        yield
+        return
+    record = _active[-1]
+    start = _mark()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - t0
+        peak = _peak_mb(start)
+        record["stages"].append({"name": name, "seconds": seconds, "peak_mb": peak})
+        record["peak_mb"] = max(record["peak_mb"], peak)
+
+
+def profiled(command_name, func):
+    """Wrap a command function so each call is timed when profiling is on."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kw):
+        if not _state["enabled"]:
+            return func(*args, **kw)
+        with stage(command_name):
+            record = {
+                "command": command_name,
+                "start": time.time(),
+                "seconds": 0.0,
+                "peak_mb": 0.0,
+                "stages": [],
+            }
+            _active.append(record)
+            start = _mark()
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kw)
+            finally:
+                record["seconds"] = time.perf_counter() - t0
+                record["peak_mb"] = max(record["peak_mb"], _peak_mb(start))
+                _active.pop()
+                _write_record(record)
+
+    return wrapper
+
+
+def _write_record(record):
+    _state["records"].append(record)
+    path = _state["path"]
+    session = _state["session"]
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError as err:
+        if session is not None:
+            session.logger.warning(f"Could not write profile record to {path}: {err}")
+    if session is not None:
+        session.logger.info(_summary_html([record]), is_html=True)
+
+
+def _summary_html(records):
+    lines = ["%-28s %7s %10s %12s" % ("Command / stage", "Calls", "Time (s)", "Peak (MB)")]
+    totals = {}
+    for record in records:
+        keys = [(record["command"], record["seconds"], record["peak_mb"])]
+        keys += [
+            ("  " + s["name"], s["seconds"], s["peak_mb"]) for s in record["stages"]
+        ]
+        for name, seconds, peak in keys:
+            calls, total, max_peak = totals.get(name, (0, 0.0, 0.0))
+            totals[name] = (calls + 1, total + seconds, max(max_peak, peak))
+    for name, (calls, total, peak) in totals.items():
+        lines.append("%-28s %7d %10.3f %12.1f" % (name, calls, total, peak))
+    return "<pre>%s</pre>" % "\n".join(lines)
+
+
+def bundle_profile(session, action, file=None):
+    if action == "on":
+        path = file or _state["path"] or _default_path()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        _state.update(enabled=True, path=path, session=session, records=[])
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _state["started_tracing"] = True
+        session.logger.status(f"Profiling bundle commands to {path}", log=True)
+    else:
+        records = _state["records"]
+        _state.update(enabled=False, session=None, records=[])
+        # Leave tracing alone if something else started it.
+        if _state["started_tracing"] and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        _state["started_tracing"] = False
+        if records:
+            session.logger.info(_summary_html(records), is_html=True)
+        session.logger.status("Profiling off.", log=True)
+
+
+def bundle_profile_desc():
+    from chimerax.core.commands import CmdDesc, EnumOf, SaveFileNameArg
+
+    return CmdDesc(
+        required=[("action", EnumOf(("on", "off")))],
+        keyword=[("file", SaveFileNameArg)],
+        required_arguments=["action"],
+        synopsis="Time and record memory use of each stage of the bundle commands.",
+    )
+
+
+__all__ = ["bundle_profile", "bundle_profile_desc", "is_enabled", "profiled", "stage"]
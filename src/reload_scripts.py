@@ -2,24 +2,174 @@
 
 from __future__ import annotations
 
+import hashlib
+import importlib
+import os
+import sys
+import time
 
-def reload_scripts(session):
-    from chimerax.cmd_line.tool import CommandLine
+# Module name -> (mtime, sha256 of source) when the module was last loaded.
+# Modules are added when first checked, if their source has not changed since
+# they were loaded. Kept across importlib.reload of this module.
+try:
+    _fingerprints
+except NameError:
+    _fingerprints = {}
 
-    command_line = session.tools.find_by_class(CommandLine)[0]
-    command_line._run_startup_commands()
-    session.logger.status("Startup commands re-executed.", log=True)
+
+def _package_modules():
+    package = __name__.rpartition(".")[0]
+    prefix = package + "."
+    return {
+        name: module
+        for name, module in list(sys.modules.items())
+        if (name == package or name.startswith(prefix))
+        and module is not None
+        and getattr(module, "__file__", None)
+    }
+
+
+def _fingerprint(path):
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return os.path.getmtime(path), digest
+
+
+def _load_time(module):
+    """Return the time ``module`` was loaded.
+
+    Python writes the cached bytecode when it compiles a changed source, so
+    its mtime is the load time. Without bytecode the package import time is
+    used, which at worst reloads an unchanged module.
+    """
+    try:
+        return os.path.getmtime(module.__cached__)
+    except (AttributeError, TypeError, OSError):
+        package = sys.modules[__name__.rpartition(".")[0]]
+        return getattr(package, "_load_time", 0.0)
+
+
+def _track(name, module):
+    """Start tracking ``module``; return False if it changed since it was loaded."""
+    if name in _fingerprints:
+        return True
+    if os.path.getmtime(module.__file__) > _load_time(module):
+        return False
+    _fingerprints[name] = _fingerprint(module.__file__)
+    return True
+
+
+def record_module(module):
+    """Record the source fingerprint of ``module`` and other loaded bundle modules."""
+    for name, loaded in _package_modules().items():
+        _track(name, loaded)
+
+
+def changed_modules():
+    """Return names of loaded bundle modules whose source has changed."""
+    changed = []
+    for name, module in _package_modules().items():
+        if not _track(name, module):
+            changed.append(name)
+            continue
+        path = module.__file__
+        previous = _fingerprints[name]
+        mtime = os.path.getmtime(path)
+        if previous[0] == mtime:
+            continue
+        fingerprint = _fingerprint(path)
+        if fingerprint[1] != previous[1]:
+            changed.append(name)
+        else:
+            _fingerprints[name] = fingerprint
+    return changed
+
+
+def _dependents(modules, names):
+    """Return modules that hold references to any of the modules ``names``."""
+    dependents = []
+    for name, module in modules.items():
+        if name in names:
+            continue
+        for value in vars(module).values():
+            source = getattr(value, "__module__", None) or getattr(value, "__name__", None)
+            if source in names:
+                dependents.append(name)
+                break
+    return dependents
+
+
+def reload_changed_modules():
+    """Reload changed bundle modules and the modules importing from them.
+
+    Returns the reloaded module names in reload order.
+    """
+    modules = _package_modules()
+    package = __name__.rpartition(".")[0]
+    to_reload = [name for name in changed_modules() if name != package]
+    pending = set(to_reload)
+    while pending:
+        pending = set(_dependents(modules, set(to_reload))) - set(to_reload) - {package}
+        to_reload.extend(sorted(pending))
+
+    for name in to_reload:
+        importlib.reload(modules[name])
+        _fingerprints[name] = _fingerprint(modules[name].__file__)
+    return to_reload
+
+
+def reload_scripts(session, startup=False):
+    from . import _COMMANDS, register_bundle_command
+
+    t0 = time.perf_counter()
+    package = __name__.rpartition(".")[0]
+    if package in changed_modules():
+        session.logger.warning(
+            "The bundle's __init__.py (e.g. the command table) has changed and "
+            "can't be reloaded. Restart ChimeraX to use the changes."
+        )
+    reloaded = reload_changed_modules()
+    short_names = {name[len(package) + 1 :] for name in reloaded}
+    commands = [name for name, (module, *_funcs) in _COMMANDS.items() if module in short_names]
+    for name in commands:
+        register_bundle_command(name, session.logger)
+    elapsed = time.perf_counter() - t0
+
+    if reloaded:
+        session.logger.info(
+            "Reloaded modules: %s\nRe-registered commands: %s"
+            % (", ".join(sorted(short_names)), ", ".join(commands) or "none")
+        )
+        session.logger.status(
+            f"Reloaded {len(reloaded)} modules in {elapsed:.2f} s.",
+            log=True,
+        )
+    else:
+        session.logger.status("No changed bundle modules to reload.", log=True)
+
+    if startup:
+        from chimerax.cmd_line.tool import CommandLine
+
+        command_line = session.tools.find_by_class(CommandLine)[0]
+        command_line._run_startup_commands()
+        session.logger.status("Startup commands re-executed.", log=True)
 
 
 def reload_scripts_desc():
-    from chimerax.core.commands import CmdDesc
+    from chimerax.core.commands import BoolArg, CmdDesc
 
     return CmdDesc(
         required=[],
-        keyword=[],
+        keyword=[("startup", BoolArg)],
         required_arguments=[],
-        synopsis="Reload startup commands.",
+        synopsis="Reload changed bundle modules.",
     )
 
 
-__all__ = ["reload_scripts", "reload_scripts_desc"]
+__all__ = [
+    "changed_modules",
+    "record_module",
+    "reload_changed_modules",
+    "reload_scripts",
+    "reload_scripts_desc",
+]
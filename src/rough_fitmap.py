@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
+import numpy as np
+
 from .align_center import parse_map_or_atoms
+from .profiling import stage
 
 
 def is_map(session, atomspec):
@@ -13,13 +16,188 @@ def is_map(session, atomspec):
     return maps[0] != []
 
 
-def rough_fitmap(session, atoms_or_map, inmap, search=50, radius=50, sym=False, refine=False):
+def _fitted_models(atoms_or_map):
+    from chimerax.atomic.molarray import Atoms
+
+    if isinstance(atoms_or_map, Atoms):
+        return list(atoms_or_map.unique_structures)
+    return [atoms_or_map]
+
+
+def _score_name(ismap):
+    """Name of the fit score: fitmap only computes a correlation for maps."""
+    return "correlation" if ismap else "average map value"
+
+
+def _fit_score(fits, ismap):
+    try:
+        fit = fits[0]
+        score = fit.correlation() if ismap else fit.average_map_value()
+    except (AttributeError, IndexError, TypeError):
+        return None
+    return None if score is None else float(score)
+
+
+def _symmetry_expand(session, atoms_or_map_id):
+    from chimerax.core.commands import run
+
+    with stage("symmetry expansion"):
+        orig_models = session.models._models.copy()
+        run(session, f"sym {atoms_or_map_id} biomt")
+        dif = session.models._models.keys() - orig_models
+        new_ids = [key for key in dif if len(key) == 1]
+        if new_ids:
+            atoms_or_map_id = "#" + str(new_ids[0][0])
+    return atoms_or_map_id
+
+
+def _combine(session, atoms_or_map_id):
     from chimerax.atomic import AtomicStructuresArg
     from chimerax.atomic.cmd import combine_cmd
+    from chimerax.core.commands import run
+
+    with stage("combine"):
+        run(session, f"combine {atoms_or_map_id}")
+        a = AtomicStructuresArg().parse(atoms_or_map_id, session)
+        combined = combine_cmd(session, a[0])
+        run(session, f"hide {atoms_or_map_id} models")
+    return combined, f"#{combined.id_string}"
+
+
+def _rough_fitmap_maps(
+    session, atoms_or_map, inmap, search, radius, sym, refine, cache, all_placements
+):
+    """Fit one model into each of ``inmap`` and rank the maps by fit score.
+
+    Symmetry expansion, the model centroid and the model hash are computed
+    once and shared by all maps.
+    """
+    from chimerax.core.commands import AtomSpecArg, run
+    from chimerax.core.errors import UserError
+    from chimerax.geometry import translation
+    from chimerax.map.volume import Volume
+
+    from . import fit_cache
+    from .align_center import define_centroid, volume_scene_center
+
+    atoms_or_map_id = atoms_or_map.spec
+    ismap = is_map(session, atoms_or_map_id)
+    a = AtomSpecArg().parse(atoms_or_map_id, session)
+    original = parse_map_or_atoms(session, a[0])
+    if any(original is v for v in inmap):
+        raise UserError("The model being fitted can't also be one of the target maps.")
+
+    with stage("model preparation"):
+        model_digest = fit_cache.model_hash(original) if cache else None
+        fitted = original
+        fitted_models = _fitted_models(original)
+        if sym and not ismap:
+            atoms_or_map_id = _symmetry_expand(session, atoms_or_map_id)
+            structure, atoms_or_map_id = _combine(session, atoms_or_map_id)
+            fitted = structure.atoms
+            fitted_models = [structure]
+        if isinstance(fitted, Volume):
+            model_center = volume_scene_center(fitted)
+        else:
+            model_center = define_centroid(session, fitted)
+        start_positions = [m.scene_position for m in fitted_models]
+
+    results = []
+    for volume in inmap:
+        map_id = f"#{volume.id_string}"
+        key = None
+        cached = None
+        if cache:
+            key = fit_cache.fit_key(
+                original,
+                volume,
+                model_digest,
+                search=search,
+                radius=radius,
+                sym=sym,
+                refine=refine,
+                score=_score_name(ismap),
+            )
+            cached = fit_cache.lookup(key, logger=session.logger)
+        if cached is not None:
+            transforms, score = cached
+        else:
+            shift = translation(volume_scene_center(volume) - model_center)
+            for model, position in zip(fitted_models, start_positions):
+                model.scene_position = shift * position
+            with stage("fitmap search"):
+                fits = run(
+                    session,
+                    f"fitmap {atoms_or_map_id} inmap {map_id} search {search} radius {radius}",
+                    log=False,
+                )
+            if refine:
+                with stage("fitmap refine"):
+                    fits = run(session, f"fitmap {atoms_or_map_id} inmap {map_id}", log=False)
+            transforms = fit_cache.relative_transforms(fitted_models, volume)
+            score = _fit_score(fits, ismap)
+            if cache:
+                fit_cache.store(key, transforms, score, logger=session.logger)
+        results.append((score, volume, transforms))
+
+    if all(score is None for score, _volume, _transforms in results):
+        raise UserError(f"fitmap gave no {_score_name(ismap)} to rank the maps by.")
+    results.sort(key=lambda r: -np.inf if r[0] is None else r[0], reverse=True)
+
+    score_name = _score_name(ismap).capitalize()
+    lines = ["%4s  %-10s %-30s %17s" % ("Rank", "Map", "Name", score_name)]
+    for rank, (score, volume, _transforms) in enumerate(results, start=1):
+        score_text = "n/a" if score is None else "%.4f" % score
+        lines.append(
+            "%4d  %-10s %-30s %17s" % (rank, f"#{volume.id_string}", volume.name[:30], score_text)
+        )
+    session.logger.info("<pre>%s</pre>" % "\n".join(lines), is_html=True)
+
+    best_score, best_map, best_transforms = results[0]
+    fit_cache.apply_transforms(fitted_models, best_map, best_transforms)
+    session.logger.status(
+        f"Best fit of {atoms_or_map_id} is in #{best_map.id_string} "
+        f"({_score_name(ismap)} {best_score:.4f}).",
+        log=True,
+    )
+
+    if all_placements:
+        for _score, volume, transforms in results[1:]:
+            copies = []
+            for model in fitted_models:
+                if isinstance(model, Volume):
+                    copy = run(session, f"volume copy #{model.id_string}", log=False)
+                else:
+                    copy = model.copy(f"{model.name} in #{volume.id_string}")
+                    session.models.add([copy])
+                copies.append(copy)
+            fit_cache.apply_transforms(copies, volume, transforms)
+
+    return atoms_or_map_id, [(f"#{v.id_string}", score) for score, v, _t in results]
+
+
+def rough_fitmap(
+    session,
+    atoms_or_map,
+    inmap,
+    search=50,
+    radius=50,
+    sym=False,
+    refine=False,
+    cache=True,
+    all_placements=False,
+):
     from chimerax.core.commands import AtomSpecArg, run
     from chimerax.core.commands.cli import command_function
     from chimerax.std_commands import wait
 
+    from . import fit_cache
+
+    if len(inmap) > 1:
+        return _rough_fitmap_maps(
+            session, atoms_or_map, inmap, search, radius, sym, refine, cache, all_placements
+        )
+
     align_center = command_function("align center")
 
     atoms_or_map_id = atoms_or_map.spec
@@ -29,32 +207,67 @@ def rough_fitmap(session, atoms_or_map, inmap, search=50, radius=50, sym=False,
     if inmap[0]._surfaces[0]._colors[0][3] == 255:
         run(session, f"trans {map_id} 70")
 
+    cached = None
+    if cache:
+        with stage("cache lookup"):
+            a = AtomSpecArg().parse(atoms_or_map_id, session)
+            original = parse_map_or_atoms(session, a[0])
+            key = fit_cache.fit_key(
+                original,
+                inmap[0],
+                search=search,
+                radius=radius,
+                sym=sym,
+                refine=refine,
+                score=_score_name(ismap),
+            )
+            cached = fit_cache.lookup(key, logger=session.logger)
+
     if sym and not ismap:
-        orig_models = session.models._models.copy()
-        run(session, f"sym {atoms_or_map_id} biomt")
-        dif = session.models._models.keys() - orig_models
-        new_ids = [key for key in dif if len(key) == 1]
-        if new_ids:
-            atoms_or_map_id = "#" + str(new_ids[0][0])
+        atoms_or_map_id = _symmetry_expand(session, atoms_or_map_id)
 
     a = AtomSpecArg().parse(atoms_or_map_id, session)
     parsed_atoms_or_map = parse_map_or_atoms(session, a[0])
+    fitted_models = _fitted_models(parsed_atoms_or_map)
 
-    align_center(session, parsed_atoms_or_map, inmap[0])
-    wait.wait(session, 1)
+    if cached is None:
+        align_center(session, parsed_atoms_or_map, inmap[0], each=False)
+        with stage("redraw wait"):
+            wait.wait(session, 1)
 
     if sym and not ismap:
-        run(session, f"combine {atoms_or_map_id}")
-        a = AtomicStructuresArg().parse(atoms_or_map_id, session)
-        atoms_or_map = combine_cmd(session, a[0])
-        run(session, f"hide {atoms_or_map_id} models")
-        atoms_or_map_id = f"#{atoms_or_map.id_string}"
+        atoms_or_map, atoms_or_map_id = _combine(session, atoms_or_map_id)
+        fitted_models = [atoms_or_map]
+
+    if cached is not None:
+        transforms, score = cached
+        fit_cache.apply_transforms(fitted_models, inmap[0], transforms)
+        score_text = "" if score is None else f" ({_score_name(ismap)} {score:.4f})"
+        session.logger.status(
+            f"Applied cached fit of {atoms_or_map_id} in {map_id}{score_text}. "
+            "Use cache False to search again.",
+            log=True,
+        )
+        return atoms_or_map_id, map_id
 
-    run(session, f"fitmap {atoms_or_map_id} inmap {map_id} search {search} radius {radius}")
-    wait.wait(session, 30)
+    with stage("fitmap search"):
+        fits = run(
+            session, f"fitmap {atoms_or_map_id} inmap {map_id} search {search} radius {radius}"
+        )
+    with stage("redraw wait"):
+        wait.wait(session, 30)
 
     if refine:
-        run(session, f"fitmap {atoms_or_map_id} inmap {map_id}")
+        with stage("fitmap refine"):
+            fits = run(session, f"fitmap {atoms_or_map_id} inmap {map_id}")
+
+    if cache:
+        fit_cache.store(
+            key,
+            fit_cache.relative_transforms(fitted_models, inmap[0]),
+            _fit_score(fits, ismap),
+            logger=session.logger,
+        )
 
     return atoms_or_map_id, map_id
 
@@ -71,6 +284,8 @@ def rough_fitmap_desc():
             ("radius", IntArg),
             ("sym", BoolArg),
             ("refine", BoolArg),
+            ("cache", BoolArg),
+            ("all_placements", BoolArg),
         ],
         required_arguments=["atoms_or_map", "inmap"],
         synopsis="Initial approximate fitmap command.",
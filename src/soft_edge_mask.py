@@ -5,39 +5,44 @@ from __future__ import annotations
 import numpy as np
 from scipy.ndimage import distance_transform_edt
 
+from .profiling import stage
+
 
 def extend_and_soften_mask(img_in, ini_threshold, extend_ini_mask, width_soft_mask_edge):
     """Return a softened mask based on ``img_in``."""
     img_in = np.asarray(img_in)
-    msk_out = np.zeros_like(img_in, dtype=float)
-
-    msk_out[img_in >= ini_threshold] = 1.0
+    with stage("binarize"):
+        msk_out = np.zeros_like(img_in, dtype=float)
+        msk_out[img_in >= ini_threshold] = 1.0
 
     if extend_ini_mask != 0.0:
-        extend_size = abs(extend_ini_mask)
-        binary = msk_out.astype(bool)
-        if extend_ini_mask > 0:
-            distances = distance_transform_edt(~binary)
-            msk_out[distances <= extend_size] = 1.0
-        else:
-            distances = distance_transform_edt(binary)
-            msk_out[distances <= extend_size] = 0.0
+        with stage("extend"):
+            extend_size = abs(extend_ini_mask)
+            binary = msk_out.astype(bool)
+            if extend_ini_mask > 0:
+                distances = distance_transform_edt(~binary)
+                msk_out[distances <= extend_size] = 1.0
+            else:
+                distances = distance_transform_edt(binary)
+                msk_out[distances <= extend_size] = 0.0
 
     if width_soft_mask_edge > 0.0:
-        distances = distance_transform_edt(1 - msk_out)
-        mask_edge = distances <= width_soft_mask_edge
-        mask_soft = np.zeros_like(msk_out)
-        mask_soft[mask_edge] = 0.5 + 0.5 * np.cos(
-            np.pi * distances[mask_edge] / width_soft_mask_edge
-        )
-        msk_out[mask_edge] = mask_soft[mask_edge]
+        with stage("soft edge"):
+            distances = distance_transform_edt(1 - msk_out)
+            mask_edge = distances <= width_soft_mask_edge
+            mask_soft = np.zeros_like(msk_out)
+            mask_soft[mask_edge] = 0.5 + 0.5 * np.cos(
+                np.pi * distances[mask_edge] / width_soft_mask_edge
+            )
+            msk_out[mask_edge] = mask_soft[mask_edge]
 
     return msk_out
 
 
 def soft_edge_mask(session, mask, level=0.5, extend=0, width=12):
     from chimerax.map import volume_from_grid_data
-    from chimerax.map_data import ArrayGridData
+
+    from .sparse_mask import SparseMaskGridData
 
     ini_threshold = level
     extend_ini_mask = extend
@@ -62,17 +67,19 @@ def soft_edge_mask(session, mask, level=0.5, extend=0, width=12):
         )
 
     input_mask_data = mask[0].data if hasattr(mask, "__iter__") else mask.data
-    m = input_mask_data.matrix()
+    with stage("read map"):
+        m = input_mask_data.matrix()
     softmask = extend_and_soften_mask(m, ini_threshold, extend_ini_mask, width_soft_edge)
-    new_mask = ArrayGridData(
-        softmask,
-        origin=input_mask_data.origin,
-        step=input_mask_data.step,
-        cell_angles=input_mask_data.cell_angles,
-        rotation=input_mask_data.rotation,
-        symmetries=input_mask_data.symmetries,
-    )
-    return volume_from_grid_data(new_mask, session)
+    with stage("create model"):
+        new_mask = SparseMaskGridData(
+            softmask.astype(np.float32),
+            origin=input_mask_data.origin,
+            step=input_mask_data.step,
+            cell_angles=input_mask_data.cell_angles,
+            rotation=input_mask_data.rotation,
+            symmetries=input_mask_data.symmetries,
+        )
+        return volume_from_grid_data(new_mask, session)
 
 
 def soft_edge_mask_desc():
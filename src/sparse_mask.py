@@ -0,0 +1,94 @@
+"""Compact grid data for masks that are mostly a constant value."""
+
+from __future__ import annotations
+
+import numpy as np
+from chimerax.map_data import GridData
+
+
+def _bounding_box(array, fill):
+    """Return ``(lo, hi)`` zyx index bounds of voxels differing from ``fill``."""
+    differs = array != fill
+    lo, hi = [], []
+    for axis in range(3):
+        other = tuple(a for a in range(3) if a != axis)
+        present = np.flatnonzero(differs.any(axis=other))
+        if len(present) == 0:
+            return None
+        lo.append(int(present[0]))
+        hi.append(int(present[-1]) + 1)
+    return lo, hi
+
+
+class SparseMaskGridData(GridData):
+    """Grid data storing only the bounding box of non-fill voxels.
+
+    Voxels outside the box have the constant ``fill`` value. Dense matrices
+    are built only for the regions ChimeraX asks for, so a full size array is
+    never kept in the session. Saving writes a normal full size map, and
+    ChimeraX sessions store and restore it as an ordinary full size map.
+    """
+
+    def __init__(
+        self,
+        array,
+        fill=0.0,
+        origin=(0, 0, 0),
+        step=(1, 1, 1),
+        cell_angles=(90, 90, 90),
+        rotation=((1, 0, 0), (0, 1, 0), (0, 0, 1)),
+        symmetries=(),
+        name="",
+    ):
+        array = np.asarray(array)
+        self.fill = fill
+        bounds = _bounding_box(array, fill)
+        if bounds is None:
+            self.box_origin = (0, 0, 0)
+            self.box = np.zeros((0, 0, 0), dtype=array.dtype)
+        else:
+            lo, hi = bounds
+            self.box_origin = tuple(lo)
+            self.box = array[lo[0] : hi[0], lo[1] : hi[1], lo[2] : hi[2]].copy()
+
+        grid_size = tuple(reversed(array.shape))
+        GridData.__init__(
+            self,
+            grid_size,
+            array.dtype,
+            origin,
+            step,
+            cell_angles=cell_angles,
+            rotation=rotation,
+            symmetries=symmetries,
+            name=name,
+        )
+
+    def read_matrix(self, ijk_origin, ijk_size, ijk_step, progress):
+        counts = [(s + st - 1) // st for s, st in zip(ijk_size, ijk_step)]
+        matrix = np.full(counts[::-1], self.fill, dtype=self.value_type)
+
+        src, dst = [], []
+        # Axes in zyx order to match the array layout.
+        for axis in range(3):
+            a = 2 - axis
+            origin, step, count = ijk_origin[a], ijk_step[a], counts[a]
+            b0 = self.box_origin[axis]
+            b1 = b0 + self.box.shape[axis]
+            t0 = max(0, -(-(b0 - origin) // step))
+            t1 = min(count, -(-(b1 - origin) // step))
+            if t0 >= t1:
+                return matrix
+            first = origin + step * t0 - b0
+            last = origin + step * (t1 - 1) - b0
+            src.append(slice(first, last + 1, step))
+            dst.append(slice(t0, t1))
+        matrix[tuple(dst)] = self.box[tuple(src)]
+        return matrix
+
+    @property
+    def nbytes(self):
+        return self.box.nbytes
+
+
+__all__ = ["SparseMaskGridData"]
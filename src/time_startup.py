@@ -0,0 +1,109 @@
+"""Time what the bundle adds to ChimeraX startup.
+
+Run inside ChimeraX with the bundle installed::
+
+    chimerax --exit --script "src/time_startup.py 20"
+
+The optional argument is the number of repeats. Each measurement is
+reported as the median time of the bundle's current startup path next to
+the eager path it replaced (importing every command module and building
+the residue panel through the command parser before the first frame).
+"""
+
+from __future__ import annotations
+
+import importlib
+import statistics
+import sys
+import time
+
+PACKAGE = "chimerax_custom_functions"
+
+
+def _median_ms(func, repeats):
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return 1000 * statistics.median(times)
+
+
+def _forget_bundle_modules():
+    for name in [n for n in sys.modules if n == PACKAGE or n.startswith(PACKAGE + ".")]:
+        del sys.modules[name]
+
+
+def _import_package():
+    _forget_bundle_modules()
+    importlib.import_module(PACKAGE)
+
+
+def _import_all_command_modules():
+    _forget_bundle_modules()
+    package = importlib.import_module(PACKAGE)
+    for module_name, _func, _desc in package._COMMANDS.values():
+        importlib.import_module(f".{module_name}", PACKAGE)
+
+
+def _remove_panel(session, buttons, title):
+    bp = buttons._button_panel_with_title(session, title)
+    if bp:
+        bp.tool_window.destroy()
+        bp.tool_window.cleanup()
+        session._button_panels = [b for b in buttons._button_panels(session) if b is not bp]
+
+
+def _panel_with_commands(session, title, button_commands):
+    from chimerax.core.commands import run
+
+    run(session, f'buttonpanel "{title}" rows 2 columns 3', log=False)
+    for name, command in button_commands:
+        run(session, f'buttonpanel "{title}" add "{name}" command "{command}"', log=False)
+
+
+def time_startup(session, repeats=10):
+    """Log startup timings of the bundle and return them as a dict in ms."""
+    # Put back the modules the running session uses once the imports are timed.
+    loaded = {n: m for n, m in sys.modules.items() if n == PACKAGE or n.startswith(PACKAGE + ".")}
+    try:
+        results = {
+            "import (lazy package)": _median_ms(_import_package, repeats),
+            "import (all command modules)": _median_ms(_import_all_command_modules, repeats),
+        }
+    finally:
+        _forget_bundle_modules()
+        sys.modules.update(loaded)
+
+    to_residue = importlib.import_module(".to_residue", PACKAGE)
+    results["initialize (defer panel)"] = _median_ms(lambda: to_residue.initialize(session), repeats)
+
+    if session.ui.is_gui:
+        from chimerax.buttonpanel import buttons
+
+        title = to_residue.BUTTON_PANEL_TITLE
+
+        def direct():
+            _remove_panel(session, buttons, title)
+            to_residue.create_button_panel(session)
+
+        def parsed():
+            _remove_panel(session, buttons, title)
+            _panel_with_commands(session, title, to_residue.RESIDUE_BUTTONS)
+
+        results["first frame panel build"] = _median_ms(direct, repeats)
+        results["panel build via commands"] = _median_ms(parsed, repeats)
+    else:
+        session.logger.info("No GUI, skipping the residue panel timings.")
+
+    lines = ["%-30s %10s" % ("Startup step", "Median (ms)")]
+    lines += ["%-30s %10.2f" % (name, ms) for name, ms in results.items()]
+    session.logger.info("<pre>%s</pre>" % "\n".join(lines), is_html=True)
+    print("\n".join(lines))
+    return results
+
+
+# ChimeraX runs scripts in a module named ChimeraX_sandbox_N.
+if __name__.startswith("ChimeraX_sandbox"):
+    args = sys.argv[1:]
+    time_startup(session, int(args[0]) if args else 10)  # noqa: F821
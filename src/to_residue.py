@@ -4,12 +4,134 @@ from __future__ import annotations
 
 import numpy as np
 
-from .align_center import define_centroid
 
+class ResidueIndex:
+    """Cached residue lookup tables for one structure.
+
+    Holds a residue pointer to position map, chain start/end offsets and
+    per-residue centroids (model coordinates) so residue navigation does not
+    need to scan the structure on every step. The index is rebuilt only when
+    atoms or residues are added or deleted; moved atoms just update the
+    centroids of their residues.
+    """
+
+    def __init__(self, structure):
+        residues = structure.residues
+        self.residues = residues
+        self.positions = {int(p): i for i, p in enumerate(residues.pointers)}
+
+        n = len(residues)
+        chain_ids = np.asarray(residues.chain_ids)
+        new_chain = np.ones(n, dtype=bool)
+        new_chain[1:] = chain_ids[1:] != chain_ids[:-1]
+        self.chain_starts = np.flatnonzero(new_chain)
+        self.chain_ends = np.append(self.chain_starts[1:], n) - 1
+        self.chain_of = np.cumsum(new_chain) - 1
+
+        self.centroids = self._residue_centroids(residues)
+        self._moved_atoms = []
+        self._all_moved = False
+
+    def __len__(self):
+        return len(self.residues)
+
+    @staticmethod
+    def _residue_centroids(residues):
+        counts = np.asarray(residues.num_atoms)
+        centroids = np.zeros((len(residues), 3), dtype=np.float64)
+        has_atoms = counts > 0
+        if has_atoms.any():
+            coords = residues.atoms.coords
+            offsets = np.concatenate(([0], np.cumsum(counts[has_atoms])[:-1]))
+            sums = np.add.reduceat(coords, offsets, axis=0)
+            centroids[has_atoms] = sums / counts[has_atoms, np.newaxis]
+        return centroids
+
+    def position(self, residue):
+        return self.positions.get(int(residue.cpp_pointer))
+
+    def atom_positions(self, atoms):
+        """Return the residue positions of the residues containing ``atoms``."""
+        positions = [self.position(r) for r in atoms.unique_residues]
+        return np.array([p for p in positions if p is not None], dtype=np.intp)
+
+    def chain_bounds(self, position):
+        chain = self.chain_of[position]
+        return int(self.chain_starts[chain]), int(self.chain_ends[chain])
+
+    def mark_moved(self, atoms):
+        self._moved_atoms.append(atoms)
+
+    def mark_all_moved(self):
+        self._all_moved = True
+
+    def centroid(self, position):
+        """Return the model coordinate centroid of the residue at ``position``.
+
+        Only centroids of residues whose atoms moved since the last call are
+        recomputed.
+        """
+        if self._all_moved:
+            self.centroids = self._residue_centroids(self.residues)
+        elif self._moved_atoms:
+            from chimerax.atomic import concatenate
+
+            positions = self.atom_positions(concatenate(self._moved_atoms))
+            if len(positions):
+                self.centroids[positions] = self._residue_centroids(
+                    self.residues.filter(positions)
+                )
+        self._all_moved = False
+        self._moved_atoms = []
+        return self.centroids[position]
+
+
+def _structure_changed(trigger_name, data):
+    structure, changes = data
+    structure_reasons = changes.structure_reasons()
+    topology_changed = bool(
+        changes.created_atoms()
+        or changes.num_deleted_atoms()
+        or changes.created_residues()
+        or changes.num_deleted_residues()
+    )
+    coordset_changed = "active_coordset changed" in structure_reasons
+    coords_changed = "coord changed" in changes.atom_reasons()
+
+    index = getattr(structure, "_residue_index", None)
+    if index is not None:
+        if topology_changed:
+            structure._residue_index = None
+        elif coordset_changed:
+            index.mark_all_moved()
+        elif coords_changed:
+            index.mark_moved(changes.modified_atoms())
+
+    scores = getattr(structure, "_residue_fit_scores", None)
+    if scores is not None:
+        if topology_changed:
+            scores.close()
+            structure._residue_fit_scores = None
+        elif coordset_changed:
+            scores.mark_all_modified()
+        elif coords_changed:
+            scores.mark_modified(changes.modified_atoms())
+
+
+def residue_index(structure):
+    """Return the cached :class:`ResidueIndex` for ``structure``."""
+    index = getattr(structure, "_residue_index", None)
+    if index is None:
+        if getattr(structure, "_residue_index_handler", None) is None:
+            structure._residue_index_handler = structure.triggers.add_handler(
+                "changes", _structure_changed
+            )
+        index = ResidueIndex(structure)
+        structure._residue_index = index
+    return index
 
-def _resolve_selection(session, to_ends, first):
-    from chimerax.atomic.structure import AtomicStructure
 
+def _resolve_selection(session, to_ends, first):
     residues_sets = session.selection.items("residues")
     if not residues_sets:
         session.logger.status(
@@ -19,34 +141,38 @@ def _resolve_selection(session, to_ends, first):
         return None
 
     atoms_sel = session.selection.items("atoms")
-    structures = [m for m in session.selection.models() if isinstance(m, AtomicStructure)]
-    if not structures:
-        session.logger.status("No atomic models selected.", log=True)
-        return None
 
     index = 0 if first else -1
     residues_set = residues_sets[index]
     if not residues_set:
         session.logger.status("Selection does not contain residues.", log=True)
         return None
-    residue = residues_set.filter([0 if first else len(residues_set) - 1])[0]
-    structure = structures[index]
+    residue = residues_set[0 if first else len(residues_set) - 1]
+    structure = residue.structure
+    res_index = residue_index(structure)
+    position = res_index.position(residue)
+    if position is None:
+        session.logger.status("No atomic models selected.", log=True)
+        return None
 
     selection_same = (
-        len(atoms_sel) == 1 and np.array_equal(atoms_sel[0].pointers, residue.atoms.pointers)
+        len(residues_sets) == 1
+        and len(residues_set) == 1
+        and len(atoms_sel) == 1
+        and len(atoms_sel[0]) == residue.num_atoms
     )
 
     if selection_same and to_ends:
-        target_index = 0 if first else len(structure.residues) - 1
-    else:
-        target_index = structure.residues.index(residue)
+        start, end = res_index.chain_bounds(position)
+        position = start if first else end
 
-    return structure, target_index, selection_same
+    return res_index, position, selection_same
 
 
-def _select_residue(session, residue, move=True):
-    from chimerax.core.commands import run
+def _select_residue(session, res_index, position, move=True):
+    from chimerax.geometry import translation
 
+    residue = res_index.residues[position]
     atomspec = residue.atomspec
     model = residue.structure.id_string
     if not atomspec.startswith("#"):
@@ -54,20 +180,20 @@ def _select_residue(session, residue, move=True):
     else:
         spec = atomspec
 
-    run(session, f"select {spec}")
+    session.selection.clear()
+    atoms = residue.atoms
+    atoms.selected = True
+    atoms.intra_bonds.selected = True
 
     name = residue.name
     code = residue.one_letter_code or ""
     message = f"{spec} {name} {code}"
 
     if move:
-        center = define_centroid(session, residue.atoms)
-        s2c = session.main_view.camera.position.inverse()
-        residue_center = s2c.transform_points(np.expand_dims(center, 0))
-        current_center = s2c.transform_points(np.expand_dims(session.main_view.center_of_rotation, 0))
-        center_dif = [-1 * (m - a) for m, a in zip(residue_center[0], current_center[0])]
-        run(session, "move %0.2f,%0.2f,%0.2f" % (center_dif[0], center_dif[1], center_dif[2]))
-        run(session, "cofr sel")
+        view = session.main_view
+        center = residue.structure.scene_position * res_index.centroid(position)
+        view.move(translation(view.center_of_rotation - center))
+        view.center_of_rotation = center
 
     session.logger.status(message, log=True)
 
@@ -76,22 +202,22 @@ def go_to_residue(session, step, to_ends=False, first=True, NoMove=False):
     resolved = _resolve_selection(session, to_ends, first)
     if resolved is None:
         return False
-    structure, index, selection_same = resolved
+    res_index, position, selection_same = resolved
 
     if selection_same:
-        new_index = index + step
+        new_position = position + step
     else:
-        new_index = index
+        new_position = position
 
-    if new_index < 0:
+    start, end = res_index.chain_bounds(position)
+    if new_position < start:
         session.logger.status("Start of chain.", log=True)
-        new_index = 0
-    elif new_index > len(structure.residues) - 1:
+        new_position = start
+    elif new_position > end:
         session.logger.status("End of chain.", log=True)
-        new_index = len(structure.residues) - 1
+        new_position = end
 
-    residue = structure.residues[new_index]
-    _select_residue(session, residue, move=not NoMove)
+    _select_residue(session, res_index, new_position, move=not NoMove)
     return True
 
 
@@ -115,6 +241,178 @@ def to_residue(session, NoMove=False):
     go_to_residue(session, 0, NoMove=NoMove)
 
 
+class ResidueFitScores:
+    """Per-residue map values for one structure, kept in worst-first order.
+
+    The map is sampled at every atom in a single interpolation call and the
+    values are averaged per residue with ``np.add.reduceat``. Scores are
+    z-scores relative to the map mean and standard deviation. When atoms move
+    only the residues containing those atoms are resampled.
+    """
+
+    def __init__(self, structure, volume):
+        self.structure = structure
+        self.volume = volume
+        self._map_statistics()
+        self._modified_atoms = []
+        self._all_modified = False
+        self._positions = self._scene_positions()
+        volume.data.add_change_callback(self._data_changed)
+        res_index = residue_index(structure)
+        self.scores = self._residue_scores(res_index.residues)
+        self._sort()
+
+    def _map_statistics(self):
+        mean, sd, _rms = self.volume.mean_sd_rms()
+        self.map_mean = mean
+        self.map_sd = sd if sd > 0 else 1.0
+
+    def _scene_positions(self):
+        return (
+            self.structure.scene_position.matrix.copy(),
+            self.volume.scene_position.matrix.copy(),
+        )
+
+    def _data_changed(self, change_type):
+        if change_type in ("values changed", "coordinates changed"):
+            self._map_statistics()
+            self.mark_all_modified()
+
+    def close(self):
+        """Stop following changes to the scored map."""
+        self.volume.data.remove_change_callback(self._data_changed)
+
+    def _residue_scores(self, residues):
+        counts = np.asarray(residues.num_atoms)
+        scores = np.full(len(residues), np.nan)
+        has_atoms = counts > 0
+        if has_atoms.any():
+            atoms = residues.atoms
+            values = self.volume.interpolated_values(
+                atoms.coords, self.structure.scene_position
+            )
+            offsets = np.concatenate(([0], np.cumsum(counts[has_atoms])[:-1]))
+            sums = np.add.reduceat(values, offsets)
+            scores[has_atoms] = (sums / counts[has_atoms] - self.map_mean) / self.map_sd
+        return scores
+
+    def _sort(self):
+        self.order = np.argsort(self.scores, kind="stable")
+        self.rank = np.empty_like(self.order)
+        self.rank[self.order] = np.arange(len(self.order))
+
+    def mark_modified(self, atoms):
+        self._modified_atoms.append(atoms)
+
+    def mark_all_modified(self):
+        self._all_modified = True
+
+    def update(self):
+        """Resample residues whose atoms moved since the last update.
+
+        Everything is resampled if the map values changed or the structure
+        or map moved in the scene.
+        """
+        positions_now = self._scene_positions()
+        if any(not np.array_equal(a, b) for a, b in zip(positions_now, self._positions)):
+            self._positions = positions_now
+            self._all_modified = True
+
+        res_index = residue_index(self.structure)
+        if self._all_modified:
+            self.scores = self._residue_scores(res_index.residues)
+        elif self._modified_atoms:
+            from chimerax.atomic import concatenate
+
+            positions = res_index.atom_positions(concatenate(self._modified_atoms))
+            if len(positions):
+                residues = res_index.residues.filter(positions)
+                self.scores[positions] = self._residue_scores(residues)
+        else:
+            return
+        self._all_modified = False
+        self._modified_atoms = []
+        self._sort()
+
+
+def _scored_structure(session):
+    from chimerax.atomic import AtomicStructure
+
+    residues_sets = session.selection.items("residues")
+    if residues_sets and residues_sets[0]:
+        return residues_sets[0][0].structure
+    scored = [
+        m
+        for m in session.models
+        if isinstance(m, AtomicStructure) and getattr(m, "_residue_fit_scores", None)
+    ]
+    return scored[0] if len(scored) == 1 else None
+
+
+def go_to_worst_residue(session, step, NoMove=False):
+    structure = _scored_structure(session)
+    scores = getattr(structure, "_residue_fit_scores", None) if structure else None
+    if scores is None or scores.volume.deleted:
+        session.logger.status(
+            "First score a model with the residue fit score command.", log=True
+        )
+        return False
+
+    scores.update()
+    res_index = residue_index(structure)
+    new_rank = 0
+    resolved = _resolve_selection(session, False, True) if session.selection.items("residues") else None
+    if resolved is not None:
+        _res_index, position, selection_same = resolved
+        if selection_same:
+            new_rank = int(scores.rank[position]) + step
+
+    if new_rank < 0:
+        session.logger.status("Worst residue reached.", log=True)
+        new_rank = 0
+    elif new_rank > len(scores.order) - 1:
+        session.logger.status("Best residue reached.", log=True)
+        new_rank = len(scores.order) - 1
+
+    position = int(scores.order[new_rank])
+    _select_residue(session, res_index, position, move=not NoMove)
+    session.logger.status(
+        "Fit score %.2f (rank %d of %d)"
+        % (scores.scores[position], new_rank + 1, len(scores.order)),
+        log=True,
+    )
+    return True
+
+
+def next_worst_residue(session, NoMove=False):
+    go_to_worst_residue(session, 1, NoMove=NoMove)
+
+
+def previous_worst_residue(session, NoMove=False):
+    go_to_worst_residue(session, -1, NoMove=NoMove)
+
+
+def residue_fit_score(session, structures, inmap):
+    from chimerax.core.errors import UserError
+
+    if not inmap:
+        raise UserError("No map specified")
+    volume = inmap[0]
+    for structure in structures:
+        previous = getattr(structure, "_residue_fit_scores", None)
+        if previous is not None:
+            previous.close()
+        scores = ResidueFitScores(structure, volume)
+        structure._residue_fit_scores = scores
+        valid = scores.scores[~np.isnan(scores.scores)]
+        if len(valid):
+            session.logger.status(
+                "Scored %d residues of %s in #%s. Mean fit score %.2f, worst %.2f"
+                % (len(valid), structure.atomspec, volume.id_string, valid.mean(), valid.min()),
+                log=True,
+            )
+
+
 def _residue_desc(synopsis):
     from chimerax.core.commands import BoolArg, CmdDesc
 
@@ -146,35 +444,91 @@ def to_residue_desc():
     return _residue_desc("Identify current residue of selection.")
 
 
+def next_worst_residue_desc():
+    return _residue_desc("Go to next worst fitting residue.")
+
+
+def previous_worst_residue_desc():
+    return _residue_desc("Go to previous worst fitting residue.")
+
+
+def residue_fit_score_desc():
+    from chimerax.atomic import AtomicStructuresArg
+    from chimerax.core.commands import CmdDesc
+    from chimerax.map import MapsArg
+
+    return CmdDesc(
+        required=[("structures", AtomicStructuresArg)],
+        keyword=[("inmap", MapsArg)],
+        required_arguments=["structures", "inmap"],
+        synopsis="Score the map fit of every residue for worst residue navigation.",
+    )
+
+
+BUTTON_PANEL_TITLE = "Residue shortcuts"
+RESIDUE_BUTTONS = (
+    ("To residue", "to residue"),
+    ("Previous residue", "previous residue"),
+    ("Next residue", "next residue"),
+    ("Reset cofr", "cofr all"),
+    ("First residue", "first residue"),
+    ("Last residue", "last residue"),
+)
+
+
 def create_button_panel(session):
     from chimerax.buttonpanel import buttons
-    from chimerax.core.commands import run
 
-    button_panel_title = "Residue shortcuts"
-    bp = buttons._button_panel_with_title(session, button_panel_title)
+    bp = buttons._button_panel_with_title(session, BUTTON_PANEL_TITLE)
     if bp:
         bp.tool_window.destroy()
         bp.tool_window.cleanup()
         session._button_panels = [b for b in buttons._button_panels(session) if b is not bp]
 
-    run(session, f"buttonpanel \"{button_panel_title}\" rows 2 columns 3")
-    run(session, f"buttonpanel \"{button_panel_title}\" add \"To residue\" command \"to residue\"")
-    run(session, f"buttonpanel \"{button_panel_title}\" add \"Previous residue\" command \"previous residue\"")
-    run(session, f"buttonpanel \"{button_panel_title}\" add \"Next residue\" command \"next residue\"")
-    run(session, f"buttonpanel \"{button_panel_title}\" add \"Reset cofr\" command \"cofr all\"")
-    run(session, f"buttonpanel \"{button_panel_title}\" add \"First residue\" command \"first residue\"")
-    run(session, f"buttonpanel \"{button_panel_title}\" add \"Last residue\" command \"last residue\"")
+    # Call the buttonpanel command function directly rather than going
+    # through the command parser for every button.
+    buttons.buttonpanel(session, BUTTON_PANEL_TITLE, rows=2, columns=3)
+    for name, command in RESIDUE_BUTTONS:
+        buttons.buttonpanel(session, BUTTON_PANEL_TITLE, add=name, command=command)
 
 
-def initialize(session):
-    try:
+def ensure_button_panel(session):
+    """Create the residue shortcut panel unless it already exists."""
+    from chimerax.buttonpanel import buttons
+
+    if not buttons._button_panel_with_title(session, BUTTON_PANEL_TITLE):
         create_button_panel(session)
-    except Exception as err:  # noqa: BLE001
-        session.logger.warning(f"Unable to create residue shortcut panel: {err}")
+
+
+def residue_panel(session):
+    ensure_button_panel(session)
+
+
+def residue_panel_desc():
+    from chimerax.core.commands import CmdDesc
+
+    return CmdDesc(synopsis="Show the residue shortcut button panel.")
+
+
+def initialize(session):
+    from chimerax.core.triggerset import DEREGISTER
+
+    def _create_on_first_frame(trigger_name, data):
+        try:
+            ensure_button_panel(session)
+        except Exception as err:  # noqa: BLE001
+            session.logger.warning(f"Unable to create residue shortcut panel: {err}")
+        return DEREGISTER
+
+    # Build the panel once the first frame is drawn so it doesn't add to startup time.
+    session.triggers.add_handler("new frame", _create_on_first_frame)
 
 
 __all__ = [
+    "ResidueFitScores",
+    "ResidueIndex",
     "create_button_panel",
+    "ensure_button_panel",
     "first_residue",
     "first_residue_desc",
     "initialize",
@@ -182,8 +536,17 @@ __all__ = [
     "last_residue_desc",
     "next_residue",
     "next_residue_desc",
+    "next_worst_residue",
+    "next_worst_residue_desc",
     "previous_residue",
     "previous_residue_desc",
+    "previous_worst_residue",
+    "previous_worst_residue_desc",
+    "residue_fit_score",
+    "residue_fit_score_desc",
+    "residue_index",
+    "residue_panel",
+    "residue_panel_desc",
     "to_residue",
     "to_residue_desc",
 ]